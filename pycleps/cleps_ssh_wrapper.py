@@ -1,4 +1,6 @@
-from pycleps.helpers import SlurmOptions, SbatchHeader
+from __future__ import annotations
+
+from pycleps.helpers import SlurmOptions, SbatchHeader, StagingOptions
 
 import paramiko
 from getpass import getuser
@@ -159,6 +161,7 @@ class ClepsSSHWrapper:
         slurm_options: SlurmOptions,
         sbatch_options: SbatchHeader,
         env_name: str,
+        staging_options: StagingOptions | None = None,
     ) -> str:
         """
         Submit a SLURM job to CLEPS.
@@ -169,12 +172,18 @@ class ClepsSSHWrapper:
             slurm_options: SLURM configuration.
             sbatch_options: Additional sbatch options.
             env_name: Name of conda environment to activate.
+            staging_options: Node-local scratch staging configuration (optional).
+                When set, `run_cmd` runs from a copy of `working_dir` on the compute node.
 
         Returns:
             str: SLURM job ID.
         """
         slurm_script_path = working_dir / "slurm_job.sbatch"
         slurm_directives = slurm_options.to_slurm_directives()
+        run_line = f"{run_cmd} {'${SLURM_ARRAY_TASK_ID}' if sbatch_options.array else ''}"
+        if staging_options is not None:
+            slurm_directives += "\n" + staging_options.to_slurm_directives()
+            run_line = staging_options.wrap(run_line, working_dir)
         slurm_script = f"""#!/bin/bash
 
 {slurm_directives}
@@ -182,7 +191,7 @@ class ClepsSSHWrapper:
 source ~/.bashrc
 conda activate {env_name}
 
-{run_cmd} {"${SLURM_ARRAY_TASK_ID}" if sbatch_options.array else ""}
+{run_line}
 """
         with SCPClient(self.client.get_transport()) as scp:
             scp.putfo(io.StringIO(slurm_script), slurm_script_path)
@@ -1,4 +1,7 @@
+from __future__ import annotations
+
 from pathlib import Path
+import shlex
 
 class SlurmOptions:
     """
@@ -145,3 +148,130 @@ class SbatchHeader:
         for key, value in self.other_options.items():
             options.append(f"--{key}={value}")
         return " ".join(options)
+
+
+class StagingOptions:
+    """
+    Node-local scratch staging helper.
+
+    Generates the bash snippets that copy the repository (and extra inputs) to
+    node-local scratch at task start, run the command there, and copy the
+    declared outputs back to the shared filesystem at the end, including when
+    the job is about to hit its time limit.
+    """
+
+    def __init__(
+        self,
+        outputs: list[str] | None = None,
+        inputs: list[str] | None = None,
+        scratch_dir: str = "${TMPDIR:-/tmp}",
+        signal_lead: int = 120,
+    ):
+        """
+        Initialize staging options.
+
+        Args:
+            outputs: Glob patterns (relative to the repo root) copied back after the run (e.g., "results/*.csv").
+            inputs: Extra files or directories (relative to the repo root or absolute) copied to scratch. Tar archives are extracted instead.
+            scratch_dir: Node-local base directory used for staging (default: $TMPDIR, falling back to /tmp).
+            signal_lead: Seconds before the time limit at which SLURM signals the batch shell to stage out.
+        """
+        self.outputs = list(outputs or [])
+        self.inputs = list(inputs or [])
+        self.scratch_dir = scratch_dir
+        self.signal_lead = signal_lead
+
+    def to_slurm_directives(self) -> str:
+        """
+        Generate the SLURM directive asking for an early warning signal before the time limit.
+
+        Returns:
+            str: SLURM job directive.
+        """
+        return f"#SBATCH --signal=B:USR1@{self.signal_lead}"
+
+    def wrap(self, run_cmd: str, repo_path: Path) -> str:
+        """
+        Wrap a command so that it runs from a node-local copy of the repository.
+
+        Args:
+            run_cmd: Command to execute. It runs from the root of the staged repository copy,
+                so relative paths must be given relative to the repository root.
+            repo_path: Repository path on the shared filesystem.
+
+        Returns:
+            str: Bash script body performing stage-in, run and stage-out.
+        """
+        inputs = " ".join(shlex.quote(str(i)) for i in self.inputs)
+        outputs = " ".join(shlex.quote(str(o)) for o in self.outputs)
+        return f"""STAGE_SRC="$(cd {shlex.quote(str(repo_path))} && pwd)"
+STAGE_DIR="{self.scratch_dir}/pycleps_${{SLURM_JOB_ID}}_${{SLURM_ARRAY_TASK_ID:-0}}"
+STAGE_INPUTS=({inputs})
+STAGE_OUTPUTS=({outputs})
+STAGED_OUT=0
+RUN_PID=""
+
+stage_in() {{
+    mkdir -p "$STAGE_DIR" || return 1
+    (set -o pipefail; tar -C "$STAGE_SRC" --exclude=./outputs -cf - . | tar -C "$STAGE_DIR" -xf -) || return 1
+    cd "$STAGE_SRC" || return 1
+    for input in "${{STAGE_INPUTS[@]}}"; do
+        case "$input" in
+            *.tar|*.tar.gz|*.tgz|*.tar.bz2|*.tar.xz) tar -C "$STAGE_DIR" -xf "$input" || return 1 ;;
+            *) cp -r "$input" "$STAGE_DIR/" || return 1 ;;
+        esac
+    done
+}}
+
+stage_out() {{
+    # Ignore further signals so a TERM/USR1 cannot cut the copy-back short.
+    trap '' USR1 TERM INT
+    [ "$STAGED_OUT" = 1 ] && return
+    STAGED_OUT=1
+    stage_out_start=$(date +%s)
+    stage_out_failed=0
+    cd "$STAGE_DIR" || return 1
+    shopt -s nullglob globstar
+    for pattern in "${{STAGE_OUTPUTS[@]}}"; do
+        for f in $pattern; do
+            cp -r --parents "$f" "$STAGE_SRC/" || stage_out_failed=1
+        done
+    done
+    shopt -u nullglob globstar
+    cd "$STAGE_SRC"
+    if [ "$stage_out_failed" = 1 ]; then
+        echo "[pycleps] stage-out failed, results left in $STAGE_DIR"
+        return 1
+    fi
+    rm -rf "$STAGE_DIR"
+    echo "[pycleps] stage-out took $(( $(date +%s) - stage_out_start ))s"
+}}
+
+on_signal() {{
+    trap '' USR1 TERM INT
+    echo "[pycleps] caught signal, staging out before exit"
+    [ -n "$RUN_PID" ] && kill -TERM -- -"$RUN_PID" 2>/dev/null && wait "$RUN_PID"
+    stage_out
+    exit 143
+}}
+trap on_signal USR1 TERM INT
+
+stage_in_start=$(date +%s)
+if ! stage_in; then
+    echo "[pycleps] stage-in failed"
+    rm -rf "$STAGE_DIR"
+    exit 1
+fi
+echo "[pycleps] stage-in took $(( $(date +%s) - stage_in_start ))s"
+
+cd "$STAGE_DIR"
+# Job control gives the command its own process group, so the whole tree can be signalled.
+set -m
+({run_cmd}) &
+RUN_PID=$!
+set +m
+wait "$RUN_PID"
+RUN_STATUS=$?
+stage_out || RUN_STATUS=$(( RUN_STATUS ? RUN_STATUS : 1 ))
+exit $RUN_STATUS
+"""
@@ -1,7 +1,7 @@
 import typer
 from pycleps.cleps_ssh_wrapper import ClepsSSHWrapper
 from pathlib import Path
-from pycleps.helpers import SlurmOptions, SbatchHeader
+from pycleps.helpers import SlurmOptions, SbatchHeader, StagingOptions
 from git import Repo
 import logging
 from typing import Optional
@@ -72,6 +72,9 @@ def submit(
     wait: bool = typer.Option(False, help="Wait for job completion before exiting"),
     array: Optional[str] = typer.Option(None, help="Parameters for parallel experiments (list or range)"),
     time: Optional[str] = typer.Option("", help="Time limit for simulations"),
+    stage: bool = typer.Option(False, help="Run --script from the repo root of a node-local scratch copy (--script and --stage-outputs are then relative to the repo root)"),
+    stage_inputs: str = typer.Option("", help="Extra inputs to copy (or extract) to scratch (comma-separated)"),
+    stage_outputs: str = typer.Option("", help="Output glob patterns, relative to the repo root, copied back from scratch (comma-separated)"),
 ):
     """
     Submit a job to the CLEPS cluster.
@@ -94,7 +97,21 @@ def submit(
         wait: Wait for job to finish before exiting.
         array: Parallel jobs parameters (comma-separated list or a-b format).
         time: SLURM job time limit.
+        stage: Stage the repo to node-local scratch and run `script` from the root of that copy.
+        stage_inputs: Extra inputs to stage (comma-separated).
+        stage_outputs: Output patterns to copy back after the run (comma-separated).
     """
+    if stage and not stage_outputs:
+        raise typer.BadParameter(
+            "--stage requires --stage-outputs, otherwise every result is discarded with the scratch directory.",
+            param_hint="--stage-outputs",
+        )
+    if not stage and (stage_inputs or stage_outputs):
+        raise typer.BadParameter(
+            "--stage-inputs and --stage-outputs are only used with --stage.",
+            param_hint="--stage",
+        )
+
     wd_path = Path(wd)
     repo_name = Path(repo).name.replace(".git", "")
     repo_path = wd_path / repo_name
@@ -117,8 +134,14 @@ def submit(
     
     slurm_options = SlurmOptions(array=bool(array), job_name=repo_name, cpus_per_task=cpt, output=repo_path / "outputs", time=time)
     sbatch_options = SbatchHeader(array=array, wait=wait)
+    staging_options = None
+    if stage:
+        staging_options = StagingOptions(
+            inputs=stage_inputs.split(",") if stage_inputs else [],
+            outputs=stage_outputs.split(",") if stage_outputs else [],
+        )
     
-    job_id = client.send_job(run_cmd=script, working_dir=repo_path, slurm_options=slurm_options, sbatch_options=sbatch_options, env_name=name)
+    job_id = client.send_job(run_cmd=script, working_dir=repo_path, slurm_options=slurm_options, sbatch_options=sbatch_options, env_name=name, staging_options=staging_options)
     
     if wait:
         client.fetch(job_id, repo_path)
@@ -7,7 +7,14 @@ from ParamikoMock import (
 )
 from unittest.mock import patch
 from pycleps.cleps_ssh_wrapper import ClepsSSHWrapper
+from pycleps.helpers import SlurmOptions, SbatchHeader, StagingOptions
 from pathlib import Path
+import os
+import shutil
+import signal
+import subprocess
+import tarfile
+import time
 
 USERNAME = "root"
 PASSWORD = "root"
@@ -120,3 +127,188 @@ def test_clone_repo_with_branch(mock_env):
         wrapper.clone_repo(repo_addr=repo_url, git_branch=git_branch)
 
     mock_env.cleanup_environment()
+
+
+def test_staging_directives():
+    staging = StagingOptions(signal_lead=300)
+    assert staging.to_slurm_directives() == "#SBATCH --signal=B:USR1@300"
+
+
+requires_bash = pytest.mark.skipif(shutil.which("bash") is None, reason="bash is required")
+
+
+def staged_script(tmp_path: Path, staging: StagingOptions, run_cmd: str) -> Path:
+    script_path = tmp_path / "job.sh"
+    script_path.write_text("#!/bin/bash\n" + staging.wrap(run_cmd, tmp_path / "repo"))
+    return script_path
+
+
+def staged_env() -> dict[str, str]:
+    return {**os.environ, "SLURM_JOB_ID": "42"}
+
+
+@pytest.fixture
+def staged_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "figures" / "sub").mkdir(parents=True)
+    (repo / "figures" / "sub" / "a.png").write_text("old")
+    (repo / "outputs").mkdir()
+
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "in.txt").write_text("input")
+    with tarfile.open(tmp_path / "data.tar.gz", "w:gz") as tar:
+        tar.add(tmp_path / "data", arcname="data")
+    return repo
+
+
+@requires_bash
+def test_staging_wrap_outputs(tmp_path, staged_repo):
+    scratch = tmp_path / "scratch"
+    staging = StagingOptions(
+        outputs=["results/*.csv", "figures/**"],
+        inputs=[str(tmp_path / "data.tar.gz")],
+        scratch_dir=str(scratch),
+    )
+    run_cmd = (
+        "mkdir -p results && cp data/in.txt results/in.csv && "
+        "echo new > figures/sub/a.png && echo b > figures/b.png && echo junk > junk.txt"
+    )
+    script = staged_script(tmp_path, staging, run_cmd)
+
+    proc = subprocess.run(["bash", str(script)], env=staged_env(), capture_output=True, text=True, check=False)
+
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert "stage-in took" in proc.stdout and "stage-out took" in proc.stdout
+    assert (staged_repo / "results" / "in.csv").read_text() == "input"
+    assert (staged_repo / "figures" / "b.png").read_text() == "b\n"
+    assert (staged_repo / "figures" / "sub" / "a.png").read_text() == "new\n"
+    assert not (staged_repo / "figures" / "figures").exists()
+    assert not (staged_repo / "figures" / "sub" / "sub").exists()
+    assert not (staged_repo / "junk.txt").exists()
+    assert not (staged_repo / "data").exists()
+    assert list(scratch.iterdir()) == []
+
+
+@requires_bash
+def test_staging_wrap_stage_in_failure(tmp_path, staged_repo):
+    scratch = tmp_path / "scratch"
+    staging = StagingOptions(
+        outputs=["*.txt"], inputs=[str(tmp_path / "missing")], scratch_dir=str(scratch)
+    )
+    script = staged_script(tmp_path, staging, f"touch {tmp_path / 'ran'}")
+
+    proc = subprocess.run(["bash", str(script)], env=staged_env(), capture_output=True, text=True, check=False)
+
+    assert proc.returncode == 1
+    assert "stage-in failed" in proc.stdout
+    assert not (tmp_path / "ran").exists()
+    assert list(scratch.iterdir()) == []
+
+
+@requires_bash
+def test_staging_wrap_stage_out_failure(tmp_path, staged_repo):
+    (staged_repo / "results").write_text("not a directory")
+    scratch = tmp_path / "scratch"
+    staging = StagingOptions(outputs=["results/*.csv"], scratch_dir=str(scratch))
+    script = staged_script(tmp_path, staging, "rm results && mkdir results && echo r > results/r.csv")
+
+    proc = subprocess.run(["bash", str(script)], env=staged_env(), capture_output=True, text=True, check=False)
+
+    assert proc.returncode != 0
+    assert "stage-out failed, results left in" in proc.stdout
+    assert (scratch / "pycleps_42_0" / "results" / "r.csv").read_text() == "r\n"
+
+
+def is_running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@requires_bash
+@pytest.mark.skipif(not Path("/proc").exists(), reason="/proc is required")
+def test_staging_wrap_signal(tmp_path, staged_repo):
+    pid_file = tmp_path / "sleep.pid"
+    (staged_repo / "child.sh").write_text(
+        f"mkdir -p results\necho partial > results/p.txt\nsleep 30 &\necho $! > {pid_file}\nwait\n"
+    )
+    scratch = tmp_path / "scratch"
+    staging = StagingOptions(outputs=["results/*.txt"], scratch_dir=str(scratch))
+    script = staged_script(tmp_path, staging, "bash child.sh")
+
+    proc = subprocess.Popen(["bash", str(script)], env=staged_env(), stdout=subprocess.PIPE, text=True)
+    deadline = time.time() + 10
+    while not (pid_file.exists() and pid_file.read_text().strip()) and time.time() < deadline:
+        time.sleep(0.05)
+    sleep_pid = int(pid_file.read_text())
+    proc.send_signal(signal.SIGUSR1)
+    stdout, _ = proc.communicate(timeout=10)
+
+    assert proc.returncode == 143
+    assert "caught signal" in stdout
+    assert (staged_repo / "results" / "p.txt").read_text() == "partial\n"
+    assert list(scratch.iterdir()) == []
+    deadline = time.time() + 5
+    while is_running(sleep_pid) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not is_running(sleep_pid)
+
+
+@requires_bash
+def test_staging_wrap_signal_during_stage_out(tmp_path, staged_repo):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    slow_cp = bin_dir / "cp"
+    slow_cp.write_text(f'#!/bin/bash\nsleep 0.5\nexec {shutil.which("cp")} "$@"\n')
+    slow_cp.chmod(0o755)
+    scratch = tmp_path / "scratch"
+    staging = StagingOptions(outputs=["a", "b", "c", "d"], scratch_dir=str(scratch))
+    script = staged_script(tmp_path, staging, "touch a b c d")
+    env = {**staged_env(), "PATH": f"{bin_dir}:{os.environ['PATH']}"}
+
+    proc = subprocess.Popen(["bash", str(script)], env=env, stdout=subprocess.PIPE, text=True)
+    deadline = time.time() + 10
+    while not (staged_repo / "a").exists() and time.time() < deadline:
+        time.sleep(0.05)
+    proc.send_signal(signal.SIGUSR1)
+    proc.send_signal(signal.SIGTERM)
+    stdout, _ = proc.communicate(timeout=10)
+
+    assert proc.returncode == 0, stdout
+    assert all((staged_repo / name).exists() for name in "abcd")
+    assert "stage-out took" in stdout
+    assert list(scratch.iterdir()) == []
+
+
+def test_send_job_staging(mock_env):
+    wd = Path("wd/repo")
+    add_response(
+        mock_env,
+        {"re(^sbatch .*$)": SSHCommandMock("", "Submitted batch job 42\n", "")},
+    )
+    staging = StagingOptions(outputs=["results/*.csv"], signal_lead=300)
+
+    with patch("pycleps.cleps_ssh_wrapper.paramiko.SSHClient", new=SSHClientMock), patch.object(
+        SSHClientMock, "get_transport", create=True
+    ), patch("pycleps.cleps_ssh_wrapper.SCPClient") as scp_mock:
+        wrapper = ClepsSSHWrapper(wd=wd, username=USERNAME, password=PASSWORD)
+        job_id = wrapper.send_job(
+            run_cmd="python main.py",
+            working_dir=wd,
+            slurm_options=SlurmOptions(),
+            sbatch_options=SbatchHeader(array=[]),
+            env_name="pycleps-env",
+            staging_options=staging,
+        )
+
+        scp = scp_mock.return_value.__enter__.return_value
+        uploaded = scp.putfo.call_args[0][0].getvalue()
+
+    assert job_id == "42"
+    assert "#SBATCH --signal=B:USR1@300" in uploaded.splitlines()
+    run_body = uploaded[uploaded.index('cd "$STAGE_DIR"\n'):]
+    assert "python main.py" in run_body
+
+    mock_env.cleanup_environment()